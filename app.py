@@ -439,5 +439,6 @@ def chat():
         traceback.print_exc()
         return jsonify({"error": "Terjadi kesalahan internal", "details": str(e)}), 500
 
+# Server dev (satu proses). Untuk produksi multi-worker: gunicorn -c gunicorn.conf.py
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
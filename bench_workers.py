@@ -0,0 +1,259 @@
+"""
+Benchmark mode produksi (gunicorn.conf.py): RSS/PSS per worker dan throughput
+/chat untuk 1..N worker.
+
+Contoh:
+    python bench_workers.py --max-workers 8 --client-cpus 2 --duration 10
+
+Secara default semua pertanyaan dijawab langsung dari katalog CSV, jadi jalur
+RAG (ChromaDB, embedding Mistral, LLM) TIDAK ikut diukur. Dengan --rag,
+sebagian pertanyaan masuk ke jalur RAG; ini butuh API key asli dan akses
+jaringan. Angka memori juga hanya mencakup tokenizer embedding yang benar-benar
+termuat: tanpa akses ke Hugging Face (mis. HF_HUB_OFFLINE=1 tanpa cache),
+langchain_mistralai memakai DummyTokenizer. Jenis tokenizer dan catatan ini
+ikut dicetak di output.
+
+Beban dikirim oleh proses client terpisah (multiprocessing) yang dipin ke CPU
+berbeda dari server bila jumlah core mencukupi. RSS/PSS diambil di tengah
+beban. Hasil ditulis ke bench_output.txt, log server ke bench_server.log.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.request
+
+QUESTIONS = [
+    "Dimana lokasi Hill of Gibeon?",
+    "Berapa rating Situmurun Waterfall?",
+    "Ceritakan tentang Hill of Gibeon",
+    "Destinasi wisata apa yang paling terkenal?",
+]
+
+# Intent "opini": selalu lewat get_chatbot_response_with_rag -> ChromaDB.
+RAG_QUESTIONS = [
+    "Menurutmu apa yang paling berkesan dari Pulau Samosir?",
+    "Kenapa banyak wisatawan datang ke Samosir?",
+]
+
+SERVER_LOG = "bench_server.log"
+
+
+def read_memory_kb(pid):
+    """Ambil Rss dan Pss (kB) dari /proc/<pid>/smaps_rollup."""
+    mem = {"Rss": 0, "Pss": 0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key = line.split(":")[0]
+            if key in mem:
+                mem[key] = int(line.split()[1])
+    return mem
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def sample_memory(master_pid):
+    """RSS/PSS master dan semua worker; worker yang sudah keluar dilewati."""
+    master = read_memory_kb(master_pid)
+    workers = []
+    for pid in child_pids(master_pid):
+        try:
+            workers.append(read_memory_kb(pid))
+        except FileNotFoundError:
+            pass
+    return master, workers
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or "unknown"
+
+
+def log_tail(n=30):
+    with open(SERVER_LOG, errors="replace") as f:
+        return "".join(f.readlines()[-n:])
+
+
+def wait_until_ready(url, n_workers, server, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(
+                f"Server berhenti (exit code {server.returncode}). Akhir {SERVER_LOG}:\n{log_tail()}"
+            )
+        try:
+            post_chat(url, QUESTIONS[0])
+            if len(child_pids(server.pid)) >= n_workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server tidak siap dalam batas waktu. Akhir {SERVER_LOG}:\n{log_tail()}")
+
+
+def tokenizer_name():
+    """Jenis tokenizer embedding yang dilaporkan worker di log (post_fork)."""
+    with open(SERVER_LOG, errors="replace") as f:
+        for line in f:
+            if "tokenizer embedding:" in line:
+                return line.rsplit(":", 1)[1].strip()
+    return "tidak diketahui"
+
+
+def post_chat(url, message):
+    body = json.dumps({"message": message, "history": []}).encode()
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        resp.read()
+
+
+def pin_client(cpus):
+    os.sched_setaffinity(0, cpus)
+
+
+def client_loop(task):
+    """Satu proses client: kirim request sampai waktu habis."""
+    url, stop_at, offset, questions = task
+    count = errors = 0
+    j = offset
+    while time.time() < stop_at:
+        try:
+            post_chat(url, questions[j % len(questions)])
+            count += 1
+        except OSError:
+            errors += 1
+        j += 1
+    return count, errors, time.process_time()
+
+
+def split_cpus(client_count):
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) <= client_count:
+        # Core tidak cukup untuk dipisah: client dan server berbagi semua CPU.
+        return cpus, cpus, True
+    return cpus[client_count:], cpus[:client_count], False
+
+
+def bench(n_workers, args, server_cpus, client_cpus):
+    port = args.port
+    url = f"http://127.0.0.1:{port}/chat"
+    env = dict(os.environ, WEB_CONCURRENCY=str(n_workers), BIND=f"127.0.0.1:{port}")
+    questions = QUESTIONS + RAG_QUESTIONS if args.rag else QUESTIONS
+    # stdout berisi print DEBUG aplikasi per request; yang disimpan hanya stderr
+    # (log gunicorn dan traceback) untuk diagnosis bila server gagal start.
+    with open(SERVER_LOG, "w") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--log-level", "info"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            preexec_fn=lambda: os.sched_setaffinity(0, server_cpus),
+        )
+    try:
+        wait_until_ready(url, n_workers, server)
+        concurrency = args.concurrency_per_worker * n_workers
+        stop_at = time.time() + args.duration
+        tasks = [(url, stop_at, i, questions) for i in range(concurrency)]
+        with multiprocessing.Pool(concurrency, initializer=pin_client, initargs=(client_cpus,)) as pool:
+            pending = pool.map_async(client_loop, tasks)
+            time.sleep(args.duration / 2)
+            master, workers = sample_memory(server.pid)
+            results = pending.get()
+    finally:
+        server.terminate()
+        server.wait()
+
+    def avg_mb(key):
+        if not workers:
+            return None
+        return sum(w[key] for w in workers) / len(workers) / 1024
+
+    client_cpu_s = sum(r[2] for r in results)
+    return {
+        "workers": n_workers,
+        "rps": sum(r[0] for r in results) / args.duration,
+        "errors": sum(r[1] for r in results),
+        "client_cpu_pct": 100 * client_cpu_s / args.duration / len(client_cpus),
+        "master_rss_mb": master["Rss"] / 1024,
+        "worker_rss_mb": avg_mb("Rss"),
+        "worker_pss_mb": avg_mb("Pss"),
+        "tokenizer": tokenizer_name(),
+    }
+
+
+def fmt_mb(value):
+    return f"{'n/a':>11}" if value is None else f"{value:>9.1f}MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="default: jumlah CPU untuk server")
+    parser.add_argument("--client-cpus", type=int, default=max(1, len(os.sched_getaffinity(0)) // 4))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency-per-worker", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--rag", action="store_true",
+                        help="ikutkan pertanyaan yang lewat ChromaDB/LLM (butuh API key asli)")
+    args = parser.parse_args()
+
+    server_cpus, client_cpus, shared = split_cpus(args.client_cpus)
+    max_workers = args.max_workers or len(server_cpus)
+
+    lines = [
+        f"Mesin: {cpu_model()}, {os.cpu_count()} CPU, Python {platform.python_version()}",
+        f"CPU server: {server_cpus}, CPU client: {client_cpus}"
+        + (" (berbagi, core tidak cukup untuk dipisah)" if shared else ""),
+        f"Durasi {args.duration:.0f}s per baris, {args.concurrency_per_worker} proses client per worker, "
+        "RSS/PSS diambil di tengah beban.",
+        "Pertanyaan: CSV + RAG (ChromaDB/LLM)" if args.rag
+        else "Pertanyaan: hanya katalog CSV; jalur RAG/ChromaDB TIDAK diukur (pakai --rag).",
+        f"{'workers':>7} {'req/s':>9} {'scale':>6} {'err':>5} {'client CPU':>10} "
+        f"{'master RSS':>11} {'worker RSS':>11} {'worker PSS':>11}",
+    ]
+    for line in lines:
+        print(line)
+
+    base_rps = None
+    tokenizers = set()
+    for n in range(1, max_workers + 1):
+        r = bench(n, args, server_cpus, client_cpus)
+        if base_rps is None:
+            base_rps = r["rps"]
+        scale = f"{r['rps'] / base_rps:>5.2f}x" if base_rps else f"{'n/a':>6}"
+        line = (
+            f"{r['workers']:>7} {r['rps']:>9.1f} {scale} {r['errors']:>5} {r['client_cpu_pct']:>9.0f}% "
+            f"{fmt_mb(r['master_rss_mb'])} {fmt_mb(r['worker_rss_mb'])} {fmt_mb(r['worker_pss_mb'])}"
+        )
+        lines.append(line)
+        print(line)
+        tokenizers.add(r["tokenizer"])
+
+    notes = [f"Tokenizer embedding di worker: {', '.join(sorted(tokenizers))}"]
+    if "DummyTokenizer" in tokenizers:
+        notes.append("Catatan: DummyTokenizer dipakai, memori tokenizer asli tidak ikut terukur.")
+    if shared:
+        notes.append("Catatan: client dan server berbagi core; kolom scale bukan skala 1..N core.")
+    for line in notes:
+        print(line)
+    lines.extend(notes)
+
+    with open("bench_output.txt", "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
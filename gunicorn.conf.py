@@ -0,0 +1,53 @@
+import gc
+import multiprocessing
+import os
+
+# --- Mode produksi: gunicorn -c gunicorn.conf.py ---
+# Katalog CSV, objek embedding (beserta tokenizer-nya) dan client upstream
+# dimuat sekali di proses master, lalu worker di-fork dan berbagi halaman
+# memori yang sama secara copy-on-write. Setiap worker hanya membuat ulang
+# client HTTP-nya sendiri.
+#
+# ChromaDB dibuat dan dimigrasikan sekali sebelum fork (when_ready), tetapi
+# index-nya TIDAK dibagi: chromadb 1.x memuat index HNSW lewat hnswlib ke heap
+# proses dan tidak menyediakan mode memory-map/read-only, jadi setiap worker
+# membuka store dan memuat index-nya sendiri. Ini disengaja: untuk ~140
+# dokumen x 1024 dimensi index-nya < 1 MB per worker, jauh lebih murah daripada
+# mengganti vector store.
+wsgi_app = "app:app"
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "sync"
+preload_app = True
+timeout = 120
+
+# GC dimatikan sebelum aplikasi di-preload supaya tidak ada koleksi yang
+# meninggalkan lubang di arena yang nanti dibagi ke worker. Dinyalakan lagi
+# di when_ready, setelah semua objek startup dibekukan.
+gc.disable()
+
+
+def when_ready(server):
+    import llm_service
+    llm_service.prepare_vector_store()
+    # Pindahkan semua objek startup ke generasi permanen supaya siklus GC
+    # (di master maupun worker) tidak menulis ke header objek dan memicu
+    # copy-on-write, lalu nyalakan lagi GC untuk master yang berumur panjang.
+    gc.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    # Bekukan juga objek yang dibuat master sejak when_ready (mis. saat respawn).
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connection pool HTTP dan koneksi SQLite Chroma tidak boleh dipakai
+    # bersama antar proses: setiap worker membuat miliknya sendiri.
+    import llm_service
+    llm_service.reinit_after_fork()
+    server.log.info(
+        "Worker %s: client upstream dibuat ulang, tokenizer embedding: %s",
+        worker.pid, type(llm_service.embedding_function.tokenizer).__name__,
+    )
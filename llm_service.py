@@ -1,6 +1,10 @@
 import os
 import random
+import subprocess
+import sys
+import httpx
 import pandas as pd
+from chromadb.api.client import SharedSystemClient
 from dotenv import load_dotenv
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
@@ -24,20 +28,49 @@ if not OPENROUTER_API_KEY:
 if not MISTRAL_API_KEY:
     raise ValueError("MISTRAL_API_KEY tidak ditemukan.")
 
+LLM_MODEL_ID = "tngtech/deepseek-r1t-chimera:free"
+
 # --- 3. Konfigurasi LLM (DeepSeek via OpenRouter) ---
-llm_client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=OPENROUTER_API_KEY,
-)
+def init_llm_client():
+    """
+    Buat client OpenRouter. Dipanggil saat import dan sekali lagi di setiap
+    worker setelah fork, karena connection pool tidak boleh dipakai bersama
+    antar proses.
+    """
+    global llm_client
+    llm_client = OpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=OPENROUTER_API_KEY,
+    )
 
-LLM_MODEL_ID = "tngtech/deepseek-r1t-chimera:free"
+init_llm_client()
 
 # --- 4. Konfigurasi Embedding ---
+# Dibuat sekali (di master gunicorn) beserta tokenizer-nya; worker mewarisi
+# objek ini dan hanya mengganti client HTTP-nya (lihat renew_embedding_clients).
 embedding_function = MistralAIEmbeddings(
     api_key=MISTRAL_API_KEY,
     model="mistral-embed"
 )
 
+def renew_embedding_clients():
+    """
+    Ganti client httpx milik embedding_function dengan yang baru, memakai
+    base_url, header, dan timeout yang sama. Tokenizer tidak dimuat ulang.
+    """
+    old_client = embedding_function.client
+    old_async_client = embedding_function.async_client
+    embedding_function.client = httpx.Client(
+        base_url=old_client.base_url,
+        headers=old_client.headers,
+        timeout=old_client.timeout,
+    )
+    embedding_function.async_client = httpx.AsyncClient(
+        base_url=old_async_client.base_url,
+        headers=old_async_client.headers,
+        timeout=old_async_client.timeout,
+    )
+
 # --- 5. Fungsi untuk ingestion ke Vector Store ---
 def ingest_data_to_vector_db(csv_file_path="data/data_toba_guide.csv", persist_directory="chroma_db"):
     if not os.path.exists(csv_file_path):
@@ -52,15 +85,67 @@ def ingest_data_to_vector_db(csv_file_path="data/data_toba_guide.csv", persist_d
         return None
 
 # --- Global vector store ---
-try:
-    global_vector_store = Chroma(
+# Chroma menyimpan System (koneksi SQLite dan index HNSW) per persist_directory
+# di cache tingkat kelas. Di mode gunicorn, master membuat dan memigrasikan
+# store sekali di proses terpisah (prepare_vector_store) tanpa membukanya
+# sendiri, sehingga setiap worker hanya membuka store yang sudah ada dengan
+# koneksinya sendiri.
+global_vector_store = None
+_vector_store_loaded = False
+
+def _create_vector_store():
+    store = Chroma(
         persist_directory="chroma_db",
         embedding_function=embedding_function
     )
-    print("ChromaDB dimuat.")
-except Exception as e:
-    print(f"ChromaDB gagal dimuat: {e}")
+    print(f"ChromaDB disiapkan. Jumlah dokumen: {store._collection.count()}")
+
+def prepare_vector_store():
+    """
+    Buat dan migrasikan ChromaDB sekali sebelum fork. Dikerjakan di proses
+    terpisah: binding Rust Chroma menjalankan thread pool koneksi yang
+    tidak ikut ter-fork, sehingga store yang dibuka di master bisa membuat
+    worker menunggu koneksi sampai timeout.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", "import llm_service; llm_service._create_vector_store()"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        print(f"ChromaDB gagal disiapkan (exit code {result.returncode}).")
+
+def get_vector_store():
+    """
+    Kembalikan ChromaDB milik proses ini, buka saat pertama dipanggil.
+    Kalau gagal dibuka, panggilan berikutnya akan mencoba lagi.
+    """
+    global global_vector_store, _vector_store_loaded
+    if not _vector_store_loaded:
+        try:
+            global_vector_store = Chroma(
+                persist_directory="chroma_db",
+                embedding_function=embedding_function
+            )
+            _vector_store_loaded = True
+            print("ChromaDB dimuat.")
+        except Exception as e:
+            print(f"ChromaDB gagal dimuat: {e}")
+            global_vector_store = None
+    return global_vector_store
+
+def reinit_after_fork():
+    """
+    Dipanggil dari hook post_fork gunicorn di setiap worker: buat client HTTP
+    sendiri, buang System Chroma yang mungkin terwarisi dari master, lalu buka
+    ChromaDB milik worker.
+    """
+    global global_vector_store, _vector_store_loaded
+    init_llm_client()
+    renew_embedding_clients()
+    SharedSystemClient.clear_system_cache()
     global_vector_store = None
+    _vector_store_loaded = False
+    get_vector_store()
 
 def get_relevant_context(retrieved_docs, question, top_k=5):
     scored = []
@@ -105,12 +190,13 @@ def get_chatbot_response_with_rag(user_message: str, chat_history: list = None):
             )
         }]
 
-    if global_vector_store is None:
+    vector_store = get_vector_store()
+    if vector_store is None:
         # Kalau vector DB gak ada, langsung ke LLM tanpa konteks
         messages_for_llm = chat_history + [{"role": "user", "content": user_message}]
     else:
         # 1. Cari dokumen relevan
-        retrieved_docs = global_vector_store.similarity_search(user_message, k=20)
+        retrieved_docs = vector_store.similarity_search(user_message, k=20)
 
         # 2. Hitung skor dan pilih top-k terbaik berdasarkan metadata dan kecocokan
         context_texts = get_relevant_context(retrieved_docs, user_message, top_k=5)
@@ -186,6 +272,7 @@ if __name__ == "__main__":
     else:
         global_vector_store = test_store
         print("ChromaDB sudah siap.")
+    _vector_store_loaded = True
 
     print("\n--- Chatbot Toba Guide Siap ---")
     print("Ketik 'keluar' untuk keluar.\n")